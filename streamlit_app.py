@@ -1,24 +1,41 @@
-import io, re
+import csv, hashlib, io, re
 from datetime import datetime
 from urllib.parse import urlparse, parse_qs, quote_plus
 
+import numpy as np
 import pandas as pd
+from pandas._libs.parsers import STR_NA_VALUES
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
 import requests
 import streamlit as st
 
 # ---------- Google Sheets loader (CSV export) ----------
 
+_RE_DRIVE_ID = re.compile(r"/d/([a-zA-Z0-9-_]+)")  # /d/<ID>/
+_RE_BARE_ID  = re.compile(r"[a-zA-Z0-9-_]{20,}")
+_RE_GID      = re.compile(r"[?&]gid=(\d+)")
+
+# One keep-alive session per server process (the script itself re-runs on every interaction),
+# so repeat fetches skip the TCP/TLS handshake. requests already asks for gzip/deflate.
+@st.cache_resource
+def _http_session() -> requests.Session:
+    session = requests.Session()
+    session.headers.update({"User-Agent": "surplus-osint/1.0"})
+    return session
+
 def _extract_gsheet_id_and_gid(link: str):
     link = (link or "").strip()
     if not link:
         return None, None
-    m = re.search(r"/d/([a-zA-Z0-9-_]+)", link)  # /d/<ID>/
+    m = _RE_DRIVE_ID.search(link)
     if m:
         sheet_id = m.group(1)
     else:
         qs = parse_qs(urlparse(link).query)
-        sheet_id = (qs.get("id", [None])[0]) or (link if re.fullmatch(r"[a-zA-Z0-9-_]{20,}", link) else None)
-    gid_match = re.search(r"[?&]gid=(\d+)", link)
+        sheet_id = (qs.get("id", [None])[0]) or (link if _RE_BARE_ID.fullmatch(link) else None)
+    gid_match = _RE_GID.search(link)
     gid = gid_match.group(1) if gid_match else "0"
     return sheet_id, gid
 
@@ -28,18 +45,58 @@ def _gsheet_csv_url(link: str):
         return None
     return f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv&gid={gid}"
 
-def load_gsheet_as_df(link: str):
-    csv_url = _gsheet_csv_url(link)
-    if not csv_url:
-        return None
+# pd.read_csv's default missing-value tokens ("", "NA", "None", "<NA>", "null", ...)
+_PANDAS_NA_VALUES = sorted(STR_NA_VALUES)
+
+def _arrow_read_csv(raw: bytes):
+    # Arrow's multithreaded parser; None when it rejects the bytes or would disagree with pd.read_csv
+    convert = pacsv.ConvertOptions(null_values=_PANDAS_NA_VALUES, strings_can_be_null=True)
     try:
-        resp = requests.get(csv_url, timeout=20)
-    except Exception:
+        tbl = pacsv.read_csv(io.BytesIO(raw), convert_options=convert)
+        names = tbl.column_names
+        if "" in names or len(set(names)) != len(names):  # pandas renames these (Unnamed: N, APN.1)
+            return None
+        if any(pa.types.is_binary(t) for t in tbl.schema.types):  # non-UTF-8 text
+            return None
+        temporal = [f.name for f in tbl.schema if pa.types.is_temporal(f.type)]
+        if temporal:  # pandas leaves dates and times as text; re-read those columns as strings
+            convert.column_types = {name: pa.string() for name in temporal}
+            tbl = pacsv.read_csv(io.BytesIO(raw), convert_options=convert)
+    except pa.ArrowInvalid:
         return None
-    if resp.status_code != 200 or not resp.content or len(resp.content) < 10:
+    # All-empty columns come back as Arrow nulls; pandas reads those as float64 NaN
+    for i, field in enumerate(tbl.schema):
+        if pa.types.is_null(field.type):
+            tbl = tbl.set_column(i, field.name, tbl.column(i).cast(pa.float64()))
+    df = tbl.to_pandas()
+    # Arrow string nulls come back as None; pandas uses NaN. Only object columns can hold None.
+    for col in df.columns[df.dtypes == object]:
+        missing = df[col].isna()
+        if missing.any():
+            df.loc[missing, col] = np.nan
+    return df
+
+# Workbook signatures: xlsx is a zip archive, legacy xls an OLE2 container
+_EXCEL_MAGIC = (b"PK\x03\x04", b"\xd0\xcf\x11\xe0")
+
+def read_csv_bytes(raw: bytes):
+    if raw[:4] in _EXCEL_MAGIC:  # Excel file saved with a .csv name; CSV-only by design
         return None
-    raw = resp.content
-    # Try common separators robustly
+    df = _arrow_read_csv(raw)
+    if df is not None and not df.empty:
+        return df
+    # Fall back to pandas: sniff the delimiter once, then try common separators robustly
+    try:
+        sniffed = csv.Sniffer().sniff(raw[:4096].decode("utf-8", "replace"), delimiters=",;|\t").delimiter
+    except csv.Error:
+        sniffed = None
+    if sniffed:
+        try:
+            df = pd.read_csv(io.BytesIO(raw), sep=sniffed, on_bad_lines="skip")
+            if not df.empty:
+                return df
+        except Exception:
+            pass
     for sep in [",", ";", "|", "\t"]:
         for eng in ["c", "python"]:
             try:
@@ -50,80 +107,258 @@ def load_gsheet_as_df(link: str):
                 continue
     return None
 
+# The cached loaders raise on failure so a bad link or sharing setting is never cached;
+# the public wrappers turn that back into None for the UI.
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _fetch_gsheet_csv(link: str) -> bytes:
+    csv_url = _gsheet_csv_url(link)
+    if not csv_url:
+        raise ValueError("not a Google Sheets link")
+    resp = _http_session().get(csv_url, timeout=20)
+    if resp.status_code != 200 or not resp.content or len(resp.content) < 10:
+        raise ValueError(f"sheet export failed (HTTP {resp.status_code})")
+    return resp.content
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _load_gsheet_df(link: str) -> pd.DataFrame:
+    df = read_csv_bytes(_fetch_gsheet_csv(link))
+    if df is None or df.empty:
+        raise ValueError("sheet export is not a readable table")
+    return df
+
+def fetch_gsheet_csv(link: str):
+    try:
+        return _fetch_gsheet_csv(link)
+    except Exception:
+        return None
+
+def load_gsheet_as_df(link: str):
+    try:
+        return _load_gsheet_df(link)
+    except Exception:
+        return None
+
+def load_gsheet_head(link: str, nrows: int = 25):
+    # Preview only needs the first rows; the full parse waits for the run.
+    # Returns (head, approximate row count from the line count; quoted newlines inflate it).
+    raw = fetch_gsheet_csv(link)
+    if raw is None or raw[:4] in _EXCEL_MAGIC:
+        return None, 0
+    approx_rows = raw.rstrip(b"\r\n").count(b"\n")
+    try:
+        df = pd.read_csv(io.BytesIO(raw), nrows=nrows, on_bad_lines="skip")
+        if not df.empty:
+            return df, approx_rows
+    except Exception:
+        pass
+    df = load_gsheet_as_df(link)
+    return (None, 0) if df is None else (df.head(nrows), approx_rows)
+
+@st.cache_data(ttl=300, max_entries=8, show_spinner=False)
+def read_csv_upload(raw: bytes):
+    return read_csv_bytes(raw)
+
 # ---------- Helpers for enrichment ----------
 
-def normalize_apn(apn: str) -> str:
-    s = str(apn or "").strip()
-    for ch in [" ", "-", "_", "/", "."]:
-        s = s.replace(ch, "")
-    return s.lower()
-
-def addr_query(address, city, state, postal):
-    parts = [str(address or "").strip(), str(city or "").strip(), str(state or "").strip(), str(postal or "").strip()]
-    parts = [p for p in parts if p]
-    return " ".join(parts)
-
-def build_gis_links(row):
-    county = str(row.get("County Finder", "") or "")
-    state = str(row.get("State", "") or "")
-    apn   = str(row.get("APN", "") or "")
-    addrq = str(row.get("addr_query", "") or "")
-    google_q = f"{county} {state} GIS parcel {apn}".strip()
-    bing_q   = google_q
-    appraiser_q = f"{county} {state} property appraiser {apn}".strip()
-    return pd.Series({
-        "GIS_Google": "https://www.google.com/search?q=" + quote_plus(google_q),
-        "GIS_Bing":   "https://www.bing.com/search?q=" + quote_plus(bing_q),
-        "Appraiser_Search": "https://www.google.com/search?q=" + quote_plus(appraiser_q),
-        "GIS_By_Address": "https://www.google.com/search?q=" + quote_plus(f"{county} {state} GIS {addrq}"),
-    })
-
-def build_people_osint_links(row):
-    addrq = str(row.get("addr_query", "") or "")
-    return pd.Series({
-        "OSINT_Google_Addr": "https://www.google.com/search?q=" + quote_plus(addrq),
-        "OSINT_Bing_Addr":   "https://www.bing.com/search?q=" + quote_plus(addrq),
-        "Whitepages":        "https://www.whitepages.com/address/" + addrq.replace(" ", "-"),
-        "FastPeopleSearch":  "https://www.fastpeoplesearch.com/address/" + addrq.replace(" ", "-"),
-        "BeenVerified":      "https://www.beenverified.com/people/search/?n=&citystatezip=" + quote_plus(addrq),
-    })
-
-def build_social_links(row):
-    addrq = str(row.get("addr_query", "") or "")
-    return pd.Series({
-        "Facebook_Search": "https://www.facebook.com/search/top/?q=" + quote_plus(addrq),
-        "LinkedIn_Search": "https://www.linkedin.com/search/results/all/?keywords=" + quote_plus(addrq),
-        "X_Search":        "https://x.com/search?q=" + quote_plus(addrq) + "&src=typed_query",
-    })
+# Arrow-backed strings: contiguous buffers, and the .str methods run as Arrow kernels
+_STR_DTYPE = "string[pyarrow]"
+_APN_STRIP = str.maketrans("", "", " -_/.")
+
+# Characters quote_plus leaves as-is; everything else becomes %XX of its UTF-8 bytes (' ' becomes '+')
+_QP_SAFE = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_.-~")
+
+def _qp_escape(ch: str) -> str:
+    return "+" if ch == " " else "".join(f"%{b:02X}" for b in ch.encode("utf-8"))
+
+def _quote_plus_arrow(values: pa.Array) -> pa.Array:
+    # quote_plus as one Arrow replace pass per distinct unsafe character, not a Python call per value
+    present = set(bytes(values.buffers()[2] or b"").decode("utf-8")) - _QP_SAFE
+    if len(present) > 24:  # unusual alphabet; one pass per character would cost more than quote_plus
+        return pa.array([None if v is None else quote_plus(v) for v in values.to_pylist()], values.type)
+    # '%' first so later escapes aren't re-escaped; ' ' last so its '+' isn't escaped as a literal '+'
+    for ch in sorted(present, key=lambda ch: (ch != "%", ch == " ", ch)):
+        values = pc.replace_substring(values, ch, _qp_escape(ch))
+    return values
+
+def _encode(text: pd.Series) -> pd.Series:
+    # Lead lists repeat counties, states and addresses: escape each distinct value once, then expand
+    arr = pa.array(text.astype(_STR_DTYPE))
+    if isinstance(arr, pa.ChunkedArray):
+        arr = arr.combine_chunks()
+    codes = pc.dictionary_encode(arr)
+    encoded = _quote_plus_arrow(codes.dictionary).take(codes.indices)
+    return pd.Series(pd.arrays.ArrowStringArray(encoded), index=text.index)
+
+def _join(*parts, sep: str = "") -> pd.Series:
+    # Element-wise concat of string Series and literals in one Arrow kernel call (no temporary per "+")
+    index = next(p.index for p in parts if isinstance(p, pd.Series))
+    arrays = [pa.array(p) if isinstance(p, pd.Series) else p for p in parts]
+    typ = next(a.type for a in arrays if not isinstance(a, str))
+    args = [pa.scalar(a, typ) if isinstance(a, str) else a for a in arrays]
+    joined = pc.binary_join_element_wise(*args, pa.scalar(sep, typ))
+    return pd.Series(pd.arrays.ArrowStringArray(joined), index=index)
+
+def normalize_apn(apn: pd.Series) -> pd.Series:
+    return apn.fillna("").astype(_STR_DTYPE).str.strip().str.translate(_APN_STRIP).str.lower()
+
+def addr_query(address: pd.Series, city: pd.Series, state: pd.Series, postal: pd.Series) -> pd.Series:
+    a, c, s, z = (p.fillna("").astype(_STR_DTYPE).str.strip() for p in (address, city, state, postal))
+    return _join(a, c, s, z, sep=" ").str.replace(r"\s+", " ", regex=True).str.strip()
+
+def build_gis_links(df: pd.DataFrame) -> pd.DataFrame:
+    county, state, apn, addrq = df["County Finder"], df["State"], df["APN"], df["addr_query"]
+    google_q    = _encode(_join(county, state, "GIS parcel", apn, sep=" ").str.strip())
+    appraiser_q = _encode(_join(county, state, "property appraiser", apn, sep=" ").str.strip())
+    by_addr_q   = _encode(_join(county, state, "GIS", addrq, sep=" "))
+    df["GIS_Google"]       = _join("https://www.google.com/search?q=", google_q)
+    df["GIS_Bing"]         = _join("https://www.bing.com/search?q=", google_q)
+    df["Appraiser_Search"] = _join("https://www.google.com/search?q=", appraiser_q)
+    df["GIS_By_Address"]   = _join("https://www.google.com/search?q=", by_addr_q)
+    return df
+
+def build_people_osint_links(df: pd.DataFrame) -> pd.DataFrame:
+    enc  = df["_addrq_enc"]
+    dash = df["_addrq_dash"]
+    df["OSINT_Google_Addr"] = _join("https://www.google.com/search?q=", enc)
+    df["OSINT_Bing_Addr"]   = _join("https://www.bing.com/search?q=", enc)
+    df["Whitepages"]        = _join("https://www.whitepages.com/address/", dash)
+    df["FastPeopleSearch"]  = _join("https://www.fastpeoplesearch.com/address/", dash)
+    df["BeenVerified"]      = _join("https://www.beenverified.com/people/search/?n=&citystatezip=", enc)
+    return df
+
+def build_social_links(df: pd.DataFrame) -> pd.DataFrame:
+    enc = df["_addrq_enc"]
+    df["Facebook_Search"] = _join("https://www.facebook.com/search/top/?q=", enc)
+    df["LinkedIn_Search"] = _join("https://www.linkedin.com/search/results/all/?keywords=", enc)
+    df["X_Search"]        = _join("https://x.com/search?q=", enc, "&src=typed_query")
+    return df
 
 def merge_on_apn(base: pd.DataFrame, other: pd.DataFrame, suffix: str) -> pd.DataFrame:
     if other is None or len(other) == 0:
         return base
-    df = base.copy()
-    pw = other.copy()
     # CSV-only merges; assume 'APN' or similar present
     for c in ["APN", "Parcel", "Parcel Number", "parcel", "parcel number"]:
-        if c in pw.columns:
-            pw.rename(columns={c: "APN"}, inplace=True)
+        if c in other.columns:
+            other = other.rename(columns={c: "APN"}, copy=False)
             break
-    if "APN" not in pw.columns:
-        pw["APN"] = ""
-    df["APN_key"] = df["APN"].astype(str).str.replace(r"\W+", "", regex=True).str.lower()
-    pw["APN_key"] = pw["APN"].astype(str).str.replace(r"\W+", "", regex=True).str.lower()
-    merged = df.merge(pw, how="left", on="APN_key", suffixes=("", suffix))
-    return merged.drop(columns=["APN_key"], errors="ignore")
+    if "APN" not in other.columns:
+        other = other.assign(APN="")
+    # Hold the key on shallow copies so neither input's column data is copied (or mutated)
+    key = "__apn_key"
+    while key in base.columns or key in other.columns:
+        key += "_"
+    left, right = base.copy(deep=False), other.copy(deep=False)
+    left[key]  = normalize_apn(base["APN"])
+    right[key] = normalize_apn(other["APN"])
+    blank = right[key] == ""
+    if blank.any():  # a missing APN identifies nothing; keep it from matching every blank-APN lead
+        right = right[~blank]
+    merged = left.merge(right, how="left", on=key, suffixes=("", suffix))
+    del merged[key]
+    return merged
 
 def to_excel_bytes(main_df: pd.DataFrame, meta: dict, batch_name: str) -> bytes:
     # Write with XlsxWriter ONLY (no openpyxl)
     bio = io.BytesIO()
-    with pd.ExcelWriter(bio, engine="xlsxwriter") as writer:
+    # Link columns are pre-built strings; skip XlsxWriter's per-cell URL detection
+    with pd.ExcelWriter(bio, engine="xlsxwriter", engine_kwargs={"options": {"strings_to_urls": False}}) as writer:
         main_df.to_excel(writer, sheet_name="enriched", index=False)
         pd.DataFrame([meta]).to_excel(writer, sheet_name="meta", index=False)
-        dict_rows = [{'column': c, 'example': str(main_df[c].dropna().astype(str).head(1).values[0]) if c in main_df.columns and main_df[c].notna().any() else ''} for c in main_df.columns]
+        # First non-null row per column in one vectorized pass instead of a dropna() per column
+        notna = main_df.notna().to_numpy()
+        has_value = notna.any(axis=0)
+        first = notna.argmax(axis=0) if len(main_df) else has_value.astype(int)
+        dict_rows = [{'column': c, 'example': str(main_df.iat[first[j], j]) if has_value[j] else ''} for j, c in enumerate(main_df.columns)]
         pd.DataFrame(dict_rows).to_excel(writer, sheet_name="columns", index=False)
     bio.seek(0)
     return bio.read()
 
+def to_parquet_bytes(main_df: pd.DataFrame) -> bytes:
+    bio = io.BytesIO()
+    main_df.to_parquet(bio, engine="pyarrow", compression="zstd", index=False)
+    return bio.getvalue()
+
+def to_feather_bytes(main_df: pd.DataFrame) -> bytes:
+    bio = io.BytesIO()
+    main_df.to_feather(bio)
+    return bio.getvalue()
+
+# ---------- Enrichment pipeline ----------
+
+def _frame_hash(df: pd.DataFrame):
+    # Hash every row in order; Streamlit's default DataFrame hash samples large frames and could serve a stale result
+    rows = hashlib.sha1(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()).hexdigest()
+    return tuple(map(str, df.columns)), tuple(map(str, df.dtypes)), rows
+
+@st.cache_data(ttl=300, max_entries=8, show_spinner=False, hash_funcs={pd.DataFrame: _frame_hash})
+def enrich_leads(leads_df: pd.DataFrame, *, use_county: bool, use_osint: bool, use_social: bool,
+                 propwire_df: pd.DataFrame = None, pradar_df: pd.DataFrame = None):
+    # Standardize columns
+    rename_map = {}
+    for c in leads_df.columns:
+        lc = str(c).strip().lower()
+        if lc in ["apn","parcel","parcel number","parcel_number"]:
+            rename_map[c] = "APN"
+        elif lc in ["address","property address","site address"]:
+            rename_map[c] = "Property Address"
+        elif lc in ["county","county finder","county_name"]:
+            rename_map[c] = "County Finder"
+        elif lc in ["city","town"]:
+            rename_map[c] = "City"
+        elif lc in ["state","st"]:
+            rename_map[c] = "State"
+        elif lc in ["zip","zipcode","postal code"]:
+            rename_map[c] = "Zip"
+    # New frame over the same column data; columns below are replaced or added, never written in place
+    df = leads_df.rename(columns=rename_map, copy=False)
+
+    for col in ["APN","Property Address","City","State","Zip","County Finder"]:
+        if col not in df.columns:
+            df[col] = ""
+        df[col] = df[col].fillna("").astype(_STR_DTYPE)
+
+    df["APN_norm"] = normalize_apn(df["APN"])
+    df["addr_query"] = addr_query(df["Property Address"], df["City"], df["State"], df["Zip"])
+    addrq = df["addr_query"]
+    df["_addrq_enc"]  = _encode(addrq)
+    df["_addrq_dash"] = addrq.str.replace(" ", "-", regex=False)
+
+    # Optional merges (CSV only)
+    if propwire_df is not None and len(propwire_df)>0:
+        df = merge_on_apn(df, propwire_df, suffix="_pw")
+    if pradar_df is not None and len(pradar_df)>0:
+        df = merge_on_apn(df, pradar_df, suffix="_pr")
+
+    # Links
+    if use_county:
+        df = build_gis_links(df)
+    if use_osint:
+        df = build_people_osint_links(df)
+    if use_social:
+        df = build_social_links(df)
+
+    # Confidence
+    apn_len   = df["APN"].str.len().to_numpy(dtype=int)
+    addr_len  = df["Property Address"].str.len().to_numpy(dtype=int)
+    city_len  = df["City"].str.len().to_numpy(dtype=int)
+    state_len = df["State"].str.len().to_numpy(dtype=int)
+    # Accumulate into one float buffer in place; the bonuses are masked adds, so only the bool masks are temporaries
+    score = np.minimum(apn_len, 12) / 12.0
+    np.add(score, 0.5, out=score, where=addr_len > 0)
+    np.add(score, 0.1, out=score, where=city_len > 0)
+    np.add(score, 0.1, out=score, where=state_len > 0)
+    np.minimum(score, 1.0, out=score)
+    df["confidence_score"] = np.round(score, 2, out=score)
+    del df["_addrq_enc"], df["_addrq_dash"]
+
+    meta = {
+        "rows_in": len(leads_df),
+        "rows_out": len(df),
+        "toggles": dict(county=use_county, osint=use_osint, social=use_social)
+    }
+    return df, meta
+
 # ---------- UI ----------
 
 st.set_page_config(page_title="Surplus Funds OSINT", page_icon="💰", layout="wide")
@@ -152,6 +387,10 @@ with st.sidebar:
     use_osint  = st.checkbox("Generate OSINT people-search links", value=True)
     use_social = st.checkbox("Generate social media dorks", value=True)
 
+    out_fmt = st.radio(
+        "Output format", ["xlsx", "parquet", "feather"], horizontal=True,
+        help="xlsx opens anywhere; parquet is much faster and smaller for big sheets (50k+ rows)."
+    )
     batch_name = st.text_input("Batch name", value=f"batch_{datetime.now().strftime('%Y%m%d_%H%M')}")
     run_btn = st.button("🚀 Run Enrichment", use_container_width=True)
 
@@ -161,12 +400,12 @@ col_main, col_prev = st.columns([3,2], gap="large")
 with col_prev:
     st.markdown("### 👀 Preview")
     if gs_url:
-        leads_df_preview = load_gsheet_as_df(gs_url)
+        leads_df_preview, approx_rows = load_gsheet_head(gs_url, nrows=25)
         if leads_df_preview is None or leads_df_preview.empty:
             st.error("Could not read that Sheet. Make sure sharing is 'Anyone with the link: Viewer' and the first row has headers.")
         else:
-            st.dataframe(leads_df_preview.head(25), use_container_width=True)
-            st.info(f"Detected {len(leads_df_preview):,} rows · {len(leads_df_preview.columns)} columns.")
+            st.dataframe(leads_df_preview, use_container_width=True)
+            st.info(f"Detected ~{approx_rows:,} rows · {len(leads_df_preview.columns)} columns.")
     else:
         st.warning("Paste a Google Sheets link in the sidebar.")
 
@@ -179,78 +418,24 @@ with col_main:
             st.error("Could not read the Google Sheet. Fix sharing or data and try again.")
             st.stop()
 
-        # Standardize columns
-        df = leads_df.copy()
-        rename_map = {}
-        for c in df.columns:
-            lc = str(c).strip().lower()
-            if lc in ["apn","parcel","parcel number","parcel_number"]:
-                rename_map[c] = "APN"
-            elif lc in ["address","property address","site address"]:
-                rename_map[c] = "Property Address"
-            elif lc in ["county","county finder","county_name"]:
-                rename_map[c] = "County Finder"
-            elif lc in ["city","town"]:
-                rename_map[c] = "City"
-            elif lc in ["state","st"]:
-                rename_map[c] = "State"
-            elif lc in ["zip","zipcode","postal code"]:
-                rename_map[c] = "Zip"
-        if rename_map:
-            df = df.rename(columns=rename_map)
-
-        for col in ["APN","Property Address","City","State","Zip","County Finder"]:
-            if col not in df.columns:
-                df[col] = ""
-
-        df["APN_norm"] = df["APN"].astype(str).apply(normalize_apn)
-        df["addr_query"] = df.apply(lambda r: addr_query(
-            r.get("Property Address",""), r.get("City",""), r.get("State",""), r.get("Zip","")
-        ), axis=1)
-
-        # Optional merges (CSV only)
-        def read_csv(upload):
-            if not upload: return None
-            try:
-                return pd.read_csv(upload)
-            except Exception:
-                return None
-        pw_df = read_csv(propwire_csv)
-        pr_df = read_csv(pradar_csv)
-        if pw_df is not None and len(pw_df)>0:
-            df = merge_on_apn(df, pw_df, suffix="_pw")
-        if pr_df is not None and len(pr_df)>0:
-            df = merge_on_apn(df, pr_df, suffix="_pr")
-
-        # Links
-        if use_county:
-            df = pd.concat([df, df.apply(build_gis_links, axis=1)], axis=1)
-        if use_osint:
-            df = pd.concat([df, df.apply(build_people_osint_links, axis=1)], axis=1)
-        if use_social:
-            df = pd.concat([df, df.apply(build_social_links, axis=1)], axis=1)
-
-        # Confidence
-        df["confidence_score"] = (
-            df["APN"].astype(str).str.len().clip(upper=12).fillna(0).astype(float)/12
-            + (df["Property Address"].astype(str).str.len()>0).astype(int)*0.5
-            + (df["City"].astype(str).str.len()>0).astype(int)*0.1
-            + (df["State"].astype(str).str.len()>0).astype(int)*0.1
-        ).clip(upper=1.0).round(2)
-
-        meta = {
-            "rows_in": len(leads_df),
-            "rows_out": len(df),
-            "toggles": dict(county=use_county, osint=use_osint, social=use_social)
-        }
-
-        xls_bytes = to_excel_bytes(df, meta, batch_name)
+        df, meta = enrich_leads(
+            leads_df, use_county=use_county, use_osint=use_osint, use_social=use_social,
+            propwire_df=read_csv_upload(propwire_csv.getvalue()) if propwire_csv else None,
+            pradar_df=read_csv_upload(pradar_csv.getvalue()) if pradar_csv else None,
+        )
+
+        if out_fmt == "parquet":
+            out_bytes, label, mime = to_parquet_bytes(df), "⬇️ Download Parquet", "application/vnd.apache.parquet"
+        elif out_fmt == "feather":
+            out_bytes, label, mime = to_feather_bytes(df), "⬇️ Download Feather", "application/vnd.apache.arrow.file"
+        else:
+            out_bytes, label, mime = to_excel_bytes(df, meta, batch_name), "⬇️ Download Workbook", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         st.success("Enrichment complete.")
         st.download_button(
-            "⬇️ Download Workbook",
-            data=xls_bytes,
-            file_name=f"{batch_name}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            label,
+            data=out_bytes,
+            file_name=f"{batch_name}.{out_fmt}",
+            mime=mime,
             use_container_width=True
         )
         st.markdown("#### 🔍 Result sample")